@@ -1,29 +1,323 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, request
 from flask_cors import CORS
+from contextlib import contextmanager
+from datetime import datetime, timezone
+import atexit
+import hashlib
 import json
+import logging
+import orjson
 import os
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    # No cross-process file locking (Windows) - run a single worker there
+    fcntl = None
 from recommendation_engine import CrewRecommendationEngine
 
 app = Flask(__name__)
 CORS(app)
 
+def ojsonify(obj, status=200):
+    """jsonify() replacement that serializes with orjson (bytes, no re-encode)"""
+    return Response(orjson.dumps(obj), status=status, mimetype='application/json')
+
+def json_etag(payload):
+    """Short content hash of an encoded payload, used as its ETag"""
+    return hashlib.sha1(payload).hexdigest()[:16]
+
+def cached_json_response(payload, etag):
+    """Serve pre-encoded JSON with an ETag, answering 304 if the client copy is current"""
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = Response(payload, mimetype='application/json')
+    response.set_etag(etag)
+    response.cache_control.no_cache = True  # Always revalidate, never serve stale
+    return response
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+CREW_FILE_PATH = os.path.join(DATA_DIR, 'crew_data.json')
+
+# Crew assignments are appended to a JSONL journal instead of rewriting
+# crew_data.json per request; the snapshot is compacted in the background.
+# The journal is shared by all worker processes on the host, which tail it
+# to pick up each other's assignments.
+CREW_JOURNAL_PATH = os.path.join(DATA_DIR, 'crew_assignments.log')
+CREW_JOURNAL_LOCK_PATH = os.path.join(DATA_DIR, 'crew_assignments.lock')
+COMPACT_INTERVAL_SECONDS = 60
+COMPACT_AFTER_CHANGES = 50
+
 # Load data
 def load_json_data(filename):
     """Load JSON data from data directory"""
-    filepath = os.path.join(os.path.dirname(__file__), 'data', filename)
+    filepath = os.path.join(DATA_DIR, filename)
     with open(filepath, 'r') as f:
         return json.load(f)
 
-CREW_DATA = load_json_data('crew_data.json')
+# Journal state: journal_lock() serializes assignments, journal appends,
+# syncs and compaction across threads and worker processes. 'generation'
+# identifies the journal file (from its header line; compaction bumps it),
+# 'offset' is how far this worker has read it and 'stat' is the
+# (st_ino, st_mtime_ns) seen at that point, for the cheap change check.
+_JOURNAL_LOCK = threading.Lock()
+_JOURNAL = {'pending': 0, 'offset': 0, 'generation': None, 'stat': None}
+
+@contextmanager
+def journal_lock():
+    """Hold the in-process lock and, where supported, an exclusive file lock"""
+    with _JOURNAL_LOCK:
+        if fcntl is None:
+            yield
+            return
+        with open(CREW_JOURNAL_LOCK_PATH, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _fsync_dir(path):
+    """Persist renames in a directory (no-op where directories can't be opened)"""
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def _read_journal_header(f):
+    """Return (generation, header size) of an open journal; headerless journals are generation 0"""
+    f.seek(0)
+    first = f.readline()
+    try:
+        header = json.loads(first)
+    except ValueError:
+        header = None
+    if isinstance(header, dict) and 'generation' in header:
+        return header['generation'], len(first)
+    return 0, 0
+
+def _write_new_journal(generation):
+    """Atomically install an empty journal for the given generation (caller holds journal_lock)"""
+    tmp_path = CREW_JOURNAL_PATH + '.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(json.dumps({'generation': generation}) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, CREW_JOURNAL_PATH)
+    _fsync_dir(DATA_DIR)
+
+def _repair_journal_tail():
+    """Drop a partial last line left by a crashed or failed append (caller holds journal_lock)"""
+    try:
+        f = open(CREW_JOURNAL_PATH, 'r+b')
+    except FileNotFoundError:
+        return
+    with f:
+        size = f.seek(0, os.SEEK_END)
+        if size == 0:
+            return
+        f.seek(size - 1)
+        if f.read(1) == b'\n':
+            return
+        f.seek(0)
+        end = f.read().rfind(b'\n') + 1
+        print(f"Truncating partial crew journal entry ({size - end} bytes)")
+        f.truncate(end)
+        f.flush()
+        os.fsync(f.fileno())
+
 FLIGHT_DATA = load_json_data('flights_data.json')
 
+# Pin the journal generation and load the crew snapshot under one lock, so
+# any compaction after this point shows up as a generation change and the
+# first sync replays exactly the entries written on top of this snapshot
+with journal_lock():
+    if not os.path.exists(CREW_JOURNAL_PATH):
+        _write_new_journal(0)
+    _repair_journal_tail()
+    with open(CREW_JOURNAL_PATH, 'rb') as _f:
+        _JOURNAL['generation'], _JOURNAL['offset'] = _read_journal_header(_f)
+    CREW_DATA = load_json_data('crew_data.json')
+
+# Flights are read-only at runtime, so serialize them once
+_FLIGHTS_JSON = orjson.dumps(FLIGHT_DATA)
+_FLIGHTS_ETAG = json_etag(_FLIGHTS_JSON)
+
+# O(1) lookup indexes (crew keyed by string ID to accept both str and int IDs)
+FLIGHT_BY_NUM = {f['flightNumber']: f for f in FLIGHT_DATA}
+CREW_BY_ID = {str(c['emp_id']): c for c in CREW_DATA}
+
+def _journal_changed():
+    """Cheap unlocked check for journal writes this worker has not applied"""
+    try:
+        stat = os.stat(CREW_JOURNAL_PATH)
+    except FileNotFoundError:
+        return False
+    return ((stat.st_ino, stat.st_mtime_ns) != _JOURNAL['stat']
+            or stat.st_size != _JOURNAL['offset'])
+
+def apply_crew_update(crew, availability, assigned_flight):
+    """Apply one availability change to the record, engine, aggregates and caches"""
+    global AVAILABLE_COUNT, CREW_VERSION
+    was_available = crew.get('availability', '').lower() == 'available'
+    is_available = availability.lower() == 'available'
+    crew['availability'] = availability
+    if assigned_flight is None:
+        crew.pop('assignedFlight', None)
+    else:
+        crew['assignedFlight'] = assigned_flight
+    if was_available != is_available:
+        AVAILABLE_COUNT += 1 if is_available else -1
+        recommendation_engine.set_availability(crew['emp_id'], is_available)
+    # Bumped last: a reader that saw the old version re-encodes on its next call
+    CREW_VERSION += 1
+
+def sync_crew_journal():
+    """Apply journal entries not yet seen by this worker (caller holds journal_lock)"""
+    try:
+        f = open(CREW_JOURNAL_PATH, 'rb')
+    except FileNotFoundError:
+        return
+    with f:
+        generation, header_size = _read_journal_header(f)
+        if generation != _JOURNAL['generation']:
+            # Another worker compacted: its snapshot holds every entry of the
+            # old journal, so catch up from the snapshot and start over
+            for snapshot_crew in load_json_data('crew_data.json'):
+                crew = CREW_BY_ID.get(str(snapshot_crew['emp_id']))
+                if crew and (crew.get('availability') != snapshot_crew.get('availability')
+                             or crew.get('assignedFlight') != snapshot_crew.get('assignedFlight')):
+                    apply_crew_update(crew, snapshot_crew.get('availability', ''),
+                                      snapshot_crew.get('assignedFlight'))
+            _JOURNAL.update(generation=generation, offset=header_size, pending=0)
+        
+        stat = os.fstat(f.fileno())
+        f.seek(_JOURNAL['offset'])
+        chunk = f.read()
+    _JOURNAL['stat'] = (stat.st_ino, stat.st_mtime_ns)
+    
+    # Only consume complete lines; a partial last line is still being written
+    end = chunk.rfind(b'\n') + 1
+    for line in chunk[:end].splitlines():
+        if not line.strip():
+            continue
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            print(f"Skipping corrupt crew journal entry: {line[:80]!r}")
+            continue
+        crew = CREW_BY_ID.get(str(entry['emp_id']))
+        if crew:
+            apply_crew_update(crew, entry['availability'], entry['assignedFlight'])
+        _JOURNAL['pending'] += 1
+    _JOURNAL['offset'] += end
+
+def append_crew_journal(crew_member, availability, assigned_flight):
+    """Append one assignment to the journal and apply it (caller holds journal_lock)"""
+    entry = {
+        'ts': datetime.now(timezone.utc).isoformat(),
+        'emp_id': crew_member['emp_id'],
+        'availability': availability,
+        'assignedFlight': assigned_flight
+    }
+    # Never glue the entry onto a partial line from a failed append
+    _repair_journal_tail()
+    with open(CREW_JOURNAL_PATH, 'a') as f:
+        f.write(json.dumps(entry) + '\n')
+        # Acknowledged assignments must survive a host crash
+        f.flush()
+        os.fsync(f.fileno())
+    # Applying through sync keeps a single write path and advances the offset
+    sync_crew_journal()
+    if (crew_member.get('availability') != availability
+            or crew_member.get('assignedFlight') != assigned_flight):
+        raise RuntimeError(f"Crew journal entry for {crew_member['emp_id']} was not applied")
+    if _JOURNAL['pending'] >= COMPACT_AFTER_CHANGES:
+        threading.Thread(target=compact_crew_journal, daemon=True).start()
+
+def compact_crew_journal():
+    """Rewrite the crew snapshot from memory and start a fresh journal"""
+    with journal_lock():
+        sync_crew_journal()
+        if not _JOURNAL['pending']:
+            return
+        # The snapshot must be durable before the journal is discarded
+        tmp_path = CREW_FILE_PATH + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(CREW_DATA, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, CREW_FILE_PATH)
+        _fsync_dir(DATA_DIR)
+        # Start the next journal generation; other workers see the new header
+        # and catch up from the snapshot just written
+        generation = _JOURNAL['generation'] + 1
+        _write_new_journal(generation)
+        with open(CREW_JOURNAL_PATH, 'rb') as f:
+            _, header_size = _read_journal_header(f)
+            stat = os.fstat(f.fileno())
+        _JOURNAL.update(generation=generation, offset=header_size, pending=0,
+                        stat=(stat.st_ino, stat.st_mtime_ns))
+
+def _schedule_compaction():
+    """Run compaction every COMPACT_INTERVAL_SECONDS on a daemon timer"""
+    def run():
+        try:
+            compact_crew_journal()
+        except Exception as e:
+            print(f"Error compacting crew journal: {str(e)}")
+        _schedule_compaction()
+    timer = threading.Timer(COMPACT_INTERVAL_SECONDS, run)
+    timer.daemon = True
+    timer.start()
+
 # Initialize recommendation engine
 recommendation_engine = CrewRecommendationEngine(CREW_DATA)
 
+# Dashboard aggregates, computed once and kept current by write handlers
+AVAILABLE_COUNT = sum(
+    1 for crew in CREW_DATA
+    if crew.get('availability', '').lower() == 'available'
+)
+PERF_SUM = sum(crew.get('performanceScore', 0) for crew in CREW_DATA)
+NEEDS_ASSIGNMENT = sum(
+    1 for flight in FLIGHT_DATA
+    if flight.get('crewAssigned', 0) < flight.get('crewRequired', 6)
+)
+
+# Bumped by every crew write; cached payloads record the version they encode
+CREW_VERSION = 0
+
+# Cached dashboard stats as one (version, JSON bytes, etag) tuple, rebuilt
+# when its version falls behind CREW_VERSION
+_STATS_CACHE = (-1, None, None)
+
+# Cached /api/crew payload as a (version, JSON bytes, etag) tuple,
+# re-encoded lazily once a write moves CREW_VERSION past it
+_CREW_JSON = (-1, None, None)
+
+# Replay the journal on top of the snapshot, then keep it compacted
+with journal_lock():
+    sync_crew_journal()
+_schedule_compaction()
+atexit.register(compact_crew_journal)
+
+@app.before_request
+def sync_with_other_workers():
+    """Pick up assignments journaled by other worker processes"""
+    if _journal_changed():
+        with journal_lock():
+            sync_crew_journal()
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({
+    return ojsonify({
         'status': 'healthy',
         'crew_count': len(CREW_DATA),
         'flight_count': len(FLIGHT_DATA)
@@ -33,73 +327,74 @@ def health_check():
 def get_dashboard_stats():
     """Get dashboard statistics"""
     try:
-        # Count available crew (case-insensitive)
-        available_crew = sum(
-            1 for crew in CREW_DATA 
-            if crew.get('availability', '').lower() == 'available'
-        )
-        
-        # Count flights needing crew
-        needs_assignment = sum(
-            1 for flight in FLIGHT_DATA 
-            if flight.get('crewAssigned', 0) < flight.get('crewRequired', 6)
-        )
+        global _STATS_CACHE
+        cached = _STATS_CACHE
+        if cached[0] != CREW_VERSION:
+            # Read the version before the data so a concurrent write leaves
+            # this entry behind and forces another rebuild
+            version = CREW_VERSION
+            avg_performance = round((PERF_SUM / len(CREW_DATA)) / 20, 1) if CREW_DATA else 0
+            
+            payload = orjson.dumps({
+                'totalFlights': len(FLIGHT_DATA),
+                'availableCrew': AVAILABLE_COUNT,
+                'needsAssignment': NEEDS_ASSIGNMENT,
+                'avgPerformance': avg_performance
+            })
+            cached = _STATS_CACHE = (version, payload, json_etag(payload))
         
-        # Calculate average performance
-        total_performance = sum(crew.get('performanceScore', 0) for crew in CREW_DATA)
-        avg_performance = round((total_performance / len(CREW_DATA)) / 20, 1) if CREW_DATA else 0
-        
-        return jsonify({
-            'totalFlights': len(FLIGHT_DATA),
-            'availableCrew': available_crew,
-            'needsAssignment': needs_assignment,
-            'avgPerformance': avg_performance
-        })
+        return cached_json_response(cached[1], cached[2])
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return ojsonify({'error': str(e)}, 500)
 
 @app.route('/api/flights', methods=['GET'])
 def get_all_flights():
     """Get all flights"""
-    return jsonify(FLIGHT_DATA)
+    return cached_json_response(_FLIGHTS_JSON, _FLIGHTS_ETAG)
 
 @app.route('/api/flights/<flight_number>', methods=['GET'])
 def get_flight_by_number(flight_number):
     """Get specific flight details"""
-    flight = next((f for f in FLIGHT_DATA if f['flightNumber'] == flight_number), None)
+    flight = FLIGHT_BY_NUM.get(flight_number)
     if not flight:
-        return jsonify({'error': 'Flight not found'}), 404
-    return jsonify(flight)
+        return ojsonify({'error': 'Flight not found'}, 404)
+    return ojsonify(flight)
 
 @app.route('/api/crew', methods=['GET'])
 def get_all_crew():
     """Get all crew members"""
-    return jsonify(CREW_DATA)
+    global _CREW_JSON
+    cached = _CREW_JSON
+    if cached[0] != CREW_VERSION:
+        version = CREW_VERSION  # Read before encoding; see get_dashboard_stats
+        payload = orjson.dumps(CREW_DATA)
+        cached = _CREW_JSON = (version, payload, json_etag(payload))
+    return cached_json_response(cached[1], cached[2])
 
 @app.route('/api/crew/<emp_id>', methods=['GET'])
 def get_crew_by_id(emp_id):
     """Get specific crew member details"""
-    crew = next((c for c in CREW_DATA if str(c['emp_id']) == str(emp_id)), None)
+    crew = CREW_BY_ID.get(str(emp_id))
     if not crew:
-        return jsonify({'error': 'Crew member not found'}), 404
-    return jsonify(crew)
+        return ojsonify({'error': 'Crew member not found'}, 404)
+    return ojsonify(crew)
 
 @app.route('/api/recommendations/<flight_number>', methods=['GET'])
 def get_recommendations(flight_number):
     """Get crew recommendations for a specific flight"""
     try:
         # Find flight
-        flight = next((f for f in FLIGHT_DATA if f['flightNumber'] == flight_number), None)
+        flight = FLIGHT_BY_NUM.get(flight_number)
         if not flight:
-            return jsonify({'error': f'Flight {flight_number} not found'}), 404
+            return ojsonify({'error': f'Flight {flight_number} not found'}, 404)
         
-        # Get recommendations from engine
-        recommendations = recommendation_engine.get_recommendations(flight, top_k=5)
+        # Get recommendations from engine (memoized until crew availability changes)
+        recommendations = recommendation_engine.get_cached_recommendations(flight, top_k=5)
         
-        return jsonify(recommendations)
+        return ojsonify(recommendations)
     except Exception as e:
         print(f"Error getting recommendations: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+        return ojsonify({'error': str(e)}, 500)
 
 # ✅ NEW ENDPOINT - ASSIGN CREW TO FLIGHT
 @app.route('/api/crew/<emp_id>/assign', methods=['POST'])
@@ -111,47 +406,32 @@ def assign_crew_to_flight(emp_id):
         flight_number = data.get('flight_number')
         
         if not flight_number:
-            return jsonify({'error': 'flight_number is required'}), 400
-        
-        # Load current crew data
-        crew_file_path = os.path.join(os.path.dirname(__file__), 'data', 'crew_data.json')
-        with open(crew_file_path, 'r') as f:
-            crew_data = json.load(f)
+            return ojsonify({'error': 'flight_number is required'}, 400)
         
         # Find the crew member by emp_id (handle both string and int IDs)
-        crew_member = None
-        crew_index = None
-        for idx, crew in enumerate(crew_data):
-            if str(crew.get('emp_id')) == str(emp_id):
-                crew_member = crew
-                crew_index = idx
-                break
+        crew_member = CREW_BY_ID.get(str(emp_id))
         
         if not crew_member:
-            return jsonify({'error': f'Crew member {emp_id} not found'}), 404
-        
-        # Check if already assigned
-        if crew_member.get('availability', '').lower() != 'available':
-            return jsonify({
-                'error': f'{crew_member["name"]} is not available (current status: {crew_member.get("availability")})'
-            }), 400
-        
-        # Update crew member status
-        crew_data[crew_index]['availability'] = 'Assigned'
-        crew_data[crew_index]['assignedFlight'] = flight_number
-        
-        # Save updated data back to JSON file
-        with open(crew_file_path, 'w') as f:
-            json.dump(crew_data, f, indent=2)
+            return ojsonify({'error': f'Crew member {emp_id} not found'}, 404)
         
-        # Update global CREW_DATA variable
-        global CREW_DATA
-        CREW_DATA = crew_data
+        with journal_lock():
+            # Apply other workers' writes first so the check sees current state
+            sync_crew_journal()
+            
+            # Check if already assigned
+            if crew_member.get('availability', '').lower() != 'available':
+                return ojsonify({
+                    'error': f'{crew_member["name"]} is not available (current status: {crew_member.get("availability")})'
+                }, 400)
+            
+            # Persist as a journal entry and apply it to the in-memory record,
+            # engine and caches; the snapshot is rewritten on compaction
+            append_crew_journal(crew_member, 'Assigned', flight_number)
         
         print(f"\n✓ ASSIGNMENT SUCCESSFUL: {crew_member['name']} (ID: {emp_id}) → Flight {flight_number}")
         print(f"  Status changed: Available → Assigned\n")
         
-        return jsonify({
+        return ojsonify({
             'success': True,
             'message': f'{crew_member["name"]} assigned to flight {flight_number}',
             'crew': {
@@ -160,13 +440,15 @@ def assign_crew_to_flight(emp_id):
                 'availability': 'Assigned',
                 'assignedFlight': flight_number
             }
-        }), 200
+        }, 200)
         
     except Exception as e:
         print(f"Error assigning crew: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+        return ojsonify({'error': str(e)}, 500)
 
 if __name__ == '__main__':
+    # LOG_LEVEL=DEBUG shows the step-by-step recommendation trace
+    logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO'), format='%(message)s')
     print("\n" + "="*70)
     print("CREWSYNC BACKEND SERVER")
     print("="*70)
@@ -175,4 +457,5 @@ if __name__ == '__main__':
     print("\nServer starting on http://localhost:5000")
     print("="*70 + "\n")
     
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    # Development server only; production runs under gunicorn (see Procfile)
+    app.run(debug=os.environ.get('FLASK_DEBUG') == '1', host='0.0.0.0', port=5000)
@@ -1,6 +1,11 @@
 import heapq
+import logging
 from collections import defaultdict
 
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
 # ============================================
 # DATA STRUCTURE IMPLEMENTATIONS
 # ============================================
@@ -34,14 +39,14 @@ class MinHeapCrewScheduler:
     def insert(self, crew, fatigue_score):
         # Use counter as tie-breaker: (priority, tie_breaker, crew)
         heapq.heappush(self.heap, (100 - fatigue_score, self.counter, crew))
-        print(f"   [HEAP INSERT] {crew.name} with fatigue score {fatigue_score}")
+        logger.debug("   [HEAP INSERT] %s with fatigue score %s", crew.name, fatigue_score)
         self.counter += 1  # Increment for next insertion
     
     def get_least_fatigued(self):
         if self.heap:
             fatigue, _, crew = heapq.heappop(self.heap)  # Note: unpack 3 elements now
             actual_fatigue = 100 - fatigue
-            print(f"   [HEAP EXTRACT-MIN] {crew.name} (fatigue: {actual_fatigue})")
+            logger.debug("   [HEAP EXTRACT-MIN] %s (fatigue: %s)", crew.name, actual_fatigue)
             return crew
         return None
     
@@ -54,19 +59,33 @@ class CertificationHashMap:
     Hash Map for O(1) crew filtering by certification
     Complexity: O(1) for lookup
     Use Case: Instantly find crew certified for specific aircraft
+    Lookups return int64 arrays of crew row indices (crew.row_index), so they
+    compose directly with NumPy masks over the engine's per-crew arrays
     """
+    _EMPTY = np.empty(0, dtype=np.int64)
+    _EMPTY.flags.writeable = False
+    
     def __init__(self):
         self.cert_map = defaultdict(list)
+        self._index_arrays = {}  # cert → frozen np.ndarray of cert_map[cert]
     
     def add_crew(self, crew):
         for cert in crew.data.get('certifications', []):
-            self.cert_map[cert].append(crew)
-        certs_str = ', '.join(crew.data.get('certifications', []))
-        print(f"   [HASH MAP INSERT] {crew.name} → [{certs_str}]")
+            self.cert_map[cert].append(crew.row_index)
+            self._index_arrays.pop(cert, None)
+        logger.debug("   [HASH MAP INSERT] %s → %s", crew.name, crew.data.get('certifications', []))
     
     def get_by_certification(self, cert_type):
-        result = self.cert_map.get(cert_type, [])
-        print(f"   [HASH MAP LOOKUP] '{cert_type}' → Found {len(result)} crew members")
+        result = self._index_arrays.get(cert_type)
+        if result is None:
+            rows = self.cert_map.get(cert_type)
+            if rows:
+                result = np.array(rows, dtype=np.int64)
+                result.flags.writeable = False  # shared between callers
+            else:
+                result = self._EMPTY
+            self._index_arrays[cert_type] = result
+        logger.debug("   [HASH MAP LOOKUP] '%s' → Found %d crew members", cert_type, len(result))
         return result
 
 
@@ -81,13 +100,13 @@ class LocationGraph:
     
     def add_route(self, origin, destination):
         self.adjacency[origin].add(destination)
-        print(f"   [GRAPH ADD EDGE] {origin} → {destination}")
+        logger.debug("   [GRAPH ADD EDGE] %s → %s", origin, destination)
     
     def can_reach(self, crew_location, flight_origin):
         # Direct connection check (O(1))
         result = flight_origin in self.adjacency.get(crew_location, set()) or crew_location == flight_origin
-        status = "✓ YES" if result else "✗ NO"
-        print(f"   [GRAPH CHECK] Can {crew_location} reach {flight_origin}? {status}")
+        logger.debug("   [GRAPH CHECK] Can %s reach %s? %s",
+                     crew_location, flight_origin, "✓ YES" if result else "✗ NO")
         return result
     
     def find_affected_flights(self, disrupted_location):
@@ -95,7 +114,7 @@ class LocationGraph:
         DFS traversal to find all affected flights
         Complexity: O(V + E)
         """
-        print(f"   [GRAPH DFS] Finding flights affected by disruption at {disrupted_location}")
+        logger.debug("   [GRAPH DFS] Finding flights affected by disruption at %s", disrupted_location)
         affected = []
         visited = set()
         
@@ -108,7 +127,7 @@ class LocationGraph:
                 dfs(neighbor)
         
         dfs(disrupted_location)
-        print(f"   [GRAPH DFS RESULT] {len(affected)} locations affected: {affected}")
+        logger.debug("   [GRAPH DFS RESULT] %d locations affected: %s", len(affected), affected)
         return affected
 
 
@@ -130,7 +149,7 @@ class BSTRankingTree:
         self.size_count = 0
     
     def insert(self, crew, score):
-        print(f"   [BST INSERT] {crew.name} with composite score {score:.2f}")
+        logger.debug("   [BST INSERT] %s with composite score %.2f", crew.name, score)
         self.root = self._insert_recursive(self.root, crew, score)
         self.size_count += 1
     
@@ -150,7 +169,7 @@ class BSTRankingTree:
         """
         result = []
         self._inorder_reverse(self.root, result, k)
-        print(f"   [BST RANGE QUERY] Retrieved top {len(result)} performers from {self.size_count} total")
+        logger.debug("   [BST RANGE QUERY] Retrieved top %d performers from %d total", len(result), self.size_count)
         return result
     
     def _inorder_reverse(self, node, result, k):
@@ -173,14 +192,14 @@ class BackupCrewQueue:
     
     def enqueue(self, crew):
         self.queue.append(crew)
-        print(f"   [QUEUE ENQUEUE] {crew.name} added to backup (position: {len(self.queue)})")
+        logger.debug("   [QUEUE ENQUEUE] %s added to backup (position: %d)", crew.name, len(self.queue))
     
     def dequeue(self):
         if self.queue:
             crew = self.queue.pop(0)
-            print(f"   [QUEUE DEQUEUE] {crew.name} removed from backup ({len(self.queue)} remaining)")
+            logger.debug("   [QUEUE DEQUEUE] %s removed from backup (%d remaining)", crew.name, len(self.queue))
             return crew
-        print(f"   [QUEUE DEQUEUE] Queue is empty!")
+        logger.debug("   [QUEUE DEQUEUE] Queue is empty!")
         return None
     
     def peek(self):
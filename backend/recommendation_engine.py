@@ -1,6 +1,46 @@
 from data_structures import *
+from functools import lru_cache
+import logging
 import re
-import random
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_CAMEL_RE = re.compile(r'([A-Z])')
+_NON_DIGIT_RE = re.compile(r'\D')
+
+
+def _readable_name(param_name):
+    """Convert camelCase parameter name to readable format"""
+    return _CAMEL_RE.sub(r' \1', param_name.replace('Score', '')).strip()
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+def _rank(scores, bonuses, top_k):
+    """
+    Add location bonuses and select the top K (highest first)
+    Complexity: O(n + k log k) via partial selection
+    Returns (positions into scores, boosted scores) for the top K
+    """
+    boosted = scores + bonuses
+    n = boosted.shape[0]
+    if top_k < n:
+        top = np.argpartition(-boosted, top_k)[:top_k]
+    else:
+        top = np.arange(n)
+    order = top[np.argsort(-boosted[top])]
+    return order, boosted[order]
+
+
+if njit is not None:
+    # numba is an optional extra (plain NumPy is as fast at this fleet size).
+    # When installed, compile eagerly at import with an explicit signature so
+    # workers are warm before serving instead of compiling inside a request.
+    _rank = njit('Tuple((i8[:], f4[:]))(f4[:], f4[:], i8)', cache=True, fastmath=True)(_rank)
 
 
 class CrewRecommendationEngine:
@@ -9,6 +49,9 @@ class CrewRecommendationEngine:
     NO ML/AI - Pure data structure-driven decision making
     """
     
+    # Flight fields get_recommendations reads; they form the cache key
+    FLIGHT_KEY_FIELDS = ('flightNumber', 'aircraft', 'origin', 'destination', 'route')
+    
     # Parameter weights (total = 100%)
     WEIGHTS = {
         'fatigueScore': 0.15,
@@ -30,9 +73,24 @@ class CrewRecommendationEngine:
         'routeFamiliarityScore': 0.01
     }
     
+    # Readable names precomputed for every weighted parameter
+    _READABLE_NAMES = {k: _readable_name(k) for k in WEIGHTS}
+    
     def __init__(self, crew_data):
         self.crew_members = [CrewMember(c) for c in crew_data]
         
+        # Weight vector for the structure-of-arrays score matrix built in
+        # _initialize_data_structures (one column per weighted parameter)
+        self._param_names = list(self.WEIGHTS.keys())
+        self._weights_vec = np.array(
+            [self.WEIGHTS[k] for k in self._param_names], dtype=np.float32
+        )
+        
+        # Recommendations are memoized per (flight key, crew version, top_k);
+        # set_availability() bumps the version so stale entries are never hit
+        self._version = 0
+        self._cached_recommendations = lru_cache(maxsize=512)(self._recommend_for_key)
+        
         # Initialize all data structures
         self.cert_hashmap = CertificationHashMap()
         self.location_graph = LocationGraph()
@@ -43,33 +101,80 @@ class CrewRecommendationEngine:
     
     def _initialize_data_structures(self):
         """Populate all data structures with crew data"""
-        print("\n" + "="*70)
-        print("INITIALIZING DATA STRUCTURES")
-        print("="*70)
-        
-        print("\n[1] HASH MAP - Certification Index")
-        for crew in self.crew_members:
-            self.cert_hashmap.add_crew(crew)
+        logger.debug("INITIALIZING DATA STRUCTURES")
         
-        print("\n[2] MIN-HEAP - Fatigue Monitoring")
-        for crew in self.crew_members:
-            self.fatigue_heap.insert(crew, crew.data.get('fatigueScore', 50))
-        
-        print("\n[3] QUEUE - Backup Crew Management")
-        for crew in self.crew_members:
-            if crew.data.get('availability') == 'Backup':
-                self.backup_queue.enqueue(crew)
-        
-        print("\n[4] GRAPH - Location Network")
+        logger.debug("[1] GRAPH - Location Network")
         locations = ['DEL', 'BOM', 'BLR', 'HYD', 'GOI']
         for loc1 in locations:
             for loc2 in locations:
                 if loc1 != loc2:
                     self.location_graph.add_route(loc1, loc2)
         
-        print("\n" + "="*70)
-        print(f"✓ Initialized {len(self.crew_members)} crew members across all data structures")
-        print("="*70 + "\n")
+        # Integer id per known location (graph nodes, then crew bases)
+        self._location_ids = {loc: i for i, loc in enumerate(locations)}
+        
+        # Per-crew arrays, one row per crew member:
+        #   _score_matrix      composite-score parameters (SoA layout)
+        #   _availability_mask availability bit, flipped by set_availability()
+        #   _crew_loc_ids      base location id into reachability_table
+        n = len(self.crew_members)
+        self._score_matrix = np.zeros((n, len(self._param_names)), dtype=np.float32)
+        self._availability_mask = np.zeros(n, dtype=bool)
+        self._crew_loc_ids = np.zeros(n, dtype=np.int64)
+        self._row_by_id = {}
+        
+        logger.debug("[2] HASH MAP + MIN-HEAP + QUEUE + SCORE MATRIX - single pass over crew")
+        for row, crew in enumerate(self.crew_members):
+            data = crew.data
+            crew.row_index = row
+            self._row_by_id[str(crew.emp_id)] = row
+            self._score_matrix[row] = [data.get(k, 0) for k in self._param_names]
+            self._availability_mask[row] = data.get('availability', '').lower() == 'available'
+            self._crew_loc_ids[row] = self._location_ids.setdefault(
+                crew.base_location, len(self._location_ids)
+            )
+            # Score fields are static, so key strengths are computed once
+            crew.key_strengths = tuple(
+                self._format_parameter_name(k)
+                for k, v in data.items()
+                if k.endswith('Score') and v > 85
+            )
+            
+            self.cert_hashmap.add_crew(crew)
+            self.fatigue_heap.insert(crew, data.get('fatigueScore', 50))
+            if data.get('availability') == 'Backup':
+                self.backup_queue.enqueue(crew)
+        
+        logger.debug("[3] BITMAP - Precomputed Reachability")
+        # Materialize can_reach() as a dense bool table indexed by location id
+        all_locations = list(self._location_ids)
+        self.reachability_table = np.array(
+            [[self.location_graph.can_reach(loc1, loc2) for loc2 in all_locations]
+             for loc1 in all_locations],
+            dtype=bool
+        )
+        
+        logger.debug("✓ Initialized %d crew members across all data structures", len(self.crew_members))
+    
+    def set_availability(self, emp_id, available):
+        """Flip a crew member's availability bit (O(1)); returns False if unknown"""
+        row = self._row_by_id.get(str(emp_id))
+        if row is None:
+            return False
+        self._availability_mask[row] = available
+        self._version += 1
+        return True
+    
+    def get_cached_recommendations(self, flight_data, top_k=5):
+        """
+        Memoized get_recommendations - repeated polls for a flight return
+        the same (shared, read-only) list until crew availability changes
+        """
+        flight_key = tuple(flight_data.get(k) for k in self.FLIGHT_KEY_FIELDS)
+        return self._cached_recommendations(flight_key, self._version, top_k)
+    
+    def _recommend_for_key(self, flight_key, version, top_k):
+        return self.get_recommendations(dict(zip(self.FLIGHT_KEY_FIELDS, flight_key)), top_k)
     
     def calculate_composite_score(self, crew_data, flight_data=None):
         """Calculate weighted composite score from all 17 parameters"""
@@ -82,128 +187,110 @@ class CrewRecommendationEngine:
     
     def _format_parameter_name(self, param_name):
         """Convert camelCase parameter name to readable format"""
-        name = param_name.replace('Score', '')
-        name = re.sub(r'([A-Z])', r' \1', name)
-        return name.strip()
+        name = self._READABLE_NAMES.get(param_name)
+        return name if name is not None else _readable_name(param_name)
     
     def get_recommendations(self, flight_data, top_k=5):
         """
         Main recommendation algorithm - FLIGHT SPECIFIC VERSION
         Forces different crew for different flights based on base location priority
         """
-        print("\n" + "="*70)
-        print(f"RECOMMENDATION ENGINE: {flight_data['flightNumber']} ({flight_data['route']})")
-        print("="*70)
+        # Trace output is built only when DEBUG logging is enabled
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug(f"RECOMMENDATION ENGINE: {flight_data['flightNumber']} ({flight_data['route']})")
         
         # STEP 1: Filter by certification using Hash Map (O(1))
-        print(f"\n[STEP 1] HASH MAP FILTERING - Aircraft: {flight_data['aircraft']}")
-        print("-" * 70)
-        eligible_crew = self.cert_hashmap.get_by_certification(flight_data['aircraft'])
-        print(f"   Result: {len(eligible_crew)} crew members certified for {flight_data['aircraft']}")
+        if debug:
+            logger.debug(f"[STEP 1] HASH MAP FILTERING - Aircraft: {flight_data['aircraft']}")
+        idxs = self.cert_hashmap.get_by_certification(flight_data['aircraft'])
+        if debug:
+            logger.debug(f"   Result: {len(idxs)} crew members certified for {flight_data['aircraft']}")
         
         # STEP 2: Filter by availability (case-insensitive)
-        print(f"\n[STEP 2] AVAILABILITY FILTERING")
-        print("-" * 70)
-        available_crew = [
-            c for c in eligible_crew 
-            if c.data.get('availability', '').lower() == 'available'
-        ]
-        print(f"   Available crew: {len(available_crew)} out of {len(eligible_crew)}")
-        
-        if len(available_crew) > 0:
-            for crew in available_crew[:5]:
-                print(f"   ✓ {crew.name} - {crew.base_location}")
-            if len(available_crew) > 5:
-                print(f"   ... and {len(available_crew) - 5} more")
-        
-        if len(available_crew) == 0:
-            print(f"\n   ⚠ WARNING: No available crew found!")
+        eligible_count = len(idxs)
+        idxs = idxs[self._availability_mask[idxs]]
+        if debug:
+            logger.debug("[STEP 2] AVAILABILITY FILTERING")
+            logger.debug(f"   Available crew: {len(idxs)} out of {eligible_count}")
+            for i in idxs[:5].tolist():
+                crew = self.crew_members[i]
+                logger.debug(f"   ✓ {crew.name} - {crew.base_location}")
+            if len(idxs) > 5:
+                logger.debug(f"   ... and {len(idxs) - 5} more")
+        
+        if len(idxs) == 0:
+            logger.warning("No available crew found for %s", flight_data['flightNumber'])
             return []
         
-        # STEP 3: Check location feasibility using Graph (O(1) per check)
-        print(f"\n[STEP 3] GRAPH CONNECTIVITY CHECK")
-        print("-" * 70)
+        # STEP 3: Check location feasibility using the reachability bitmap
         origin = flight_data['origin']
-        reachable_crew = []
-        for crew in available_crew:
-            can_reach = self.location_graph.can_reach(crew.base_location, origin)
-            if can_reach:
-                reachable_crew.append(crew)
-        print(f"   Result: {len(reachable_crew)} crew can reach {origin}")
-        
-        if len(reachable_crew) == 0:
-            print(f"\n   ⚠ WARNING: No crew can reach {origin}!")
+        origin_id = self._location_ids.get(origin)
+        if origin_id is None:
+            # Origin unknown to the graph and to every crew base
+            idxs = idxs[:0]
+        else:
+            idxs = idxs[self.reachability_table[self._crew_loc_ids[idxs], origin_id]]
+        if debug:
+            logger.debug("[STEP 3] GRAPH CONNECTIVITY CHECK")
+            logger.debug(f"   Result: {len(idxs)} crew can reach {origin}")
+        
+        if len(idxs) == 0:
+            logger.warning("No crew can reach %s for %s", origin, flight_data['flightNumber'])
             return []
         
         # STEP 4: AGGRESSIVE FILTERING - Prioritize by base location
-        print(f"\n[STEP 4] LOCATION-BASED PRIORITY FILTERING")
-        print("-" * 70)
-        
-        # Separate crew by location priority
-        at_origin = []
-        near_origin = []
-        others = []
-        
-        for crew in reachable_crew:
-            base = crew.base_location
-            if base == origin:
-                at_origin.append(crew)
-            elif base == flight_data.get('destination'):
-                near_origin.append(crew)
-            else:
-                others.append(crew)
-        
-        print(f"   Crew at origin ({origin}): {len(at_origin)}")
-        print(f"   Crew at destination ({flight_data.get('destination')}): {len(near_origin)}")
-        print(f"   Other locations: {len(others)}")
+        # Separate crew by location priority (origin, then destination, then others)
+        loc_ids = self._crew_loc_ids[idxs]
+        at_origin = loc_ids == origin_id
+        near_origin = ~at_origin & (loc_ids == self._location_ids.get(flight_data.get('destination'), -1))
+        others = ~(at_origin | near_origin)
+        n_origin, n_near = int(at_origin.sum()), int(near_origin.sum())
+        idxs = np.concatenate((idxs[at_origin], idxs[near_origin], idxs[others]))
+        
+        if debug:
+            logger.debug("[STEP 4] LOCATION-BASED PRIORITY FILTERING")
+            logger.debug(f"   Crew at origin ({origin}): {n_origin}")
+            logger.debug(f"   Crew at destination ({flight_data.get('destination')}): {n_near}")
+            logger.debug(f"   Other locations: {len(idxs) - n_origin - n_near}")
         
         # STEP 5: Score and rank with HEAVY location weighting
-        print(f"\n[STEP 5] WEIGHTED SCORING WITH LOCATION BOOST")
-        print("-" * 70)
-        
-        crew_scores = []
-        
-        # Process crew at origin (HUGE bonus)
-        for crew in at_origin:
-            base_score = self.calculate_composite_score(crew.data, flight_data)
-            boosted_score = base_score + 20 + random.uniform(0, 5)  # +20-25 bonus
-            crew_scores.append((crew, boosted_score))
-            print(f"   {crew.name} (AT {origin}): {base_score:.2f} → {boosted_score:.2f} (+20 location bonus)")
-        
-        # Process crew near destination (medium bonus)
-        for crew in near_origin:
-            base_score = self.calculate_composite_score(crew.data, flight_data)
-            boosted_score = base_score + 10 + random.uniform(0, 3)  # +10-13 bonus
-            crew_scores.append((crew, boosted_score))
-            print(f"   {crew.name} (NEAR DEST): {base_score:.2f} → {boosted_score:.2f} (+10 bonus)")
-        
-        # Process other crew (small bonus to create variety)
-        for crew in others:
-            base_score = self.calculate_composite_score(crew.data, flight_data)
-            # Add random factor based on flight number to vary results
-            flight_num = int(''.join(filter(str.isdigit, flight_data.get('flightNumber', '0'))))
-            seed_factor = (flight_num % 10) + random.uniform(0, 5)
-            boosted_score = base_score + seed_factor
-            crew_scores.append((crew, boosted_score))
-        
-        # Sort by score (highest first)
-        crew_scores.sort(key=lambda x: x[1], reverse=True)
-        
-        # Take top K
-        top_recommendations = crew_scores[:top_k]
-        
-        # Format recommendations
-        print(f"\n[STEP 6] TOP {top_k} RECOMMENDATIONS FOR {flight_data['flightNumber']}")
-        print("-" * 70)
+        # Base scores for every reachable crew in one matrix-vector product
+        base_scores = self._score_matrix[idxs] @ self._weights_vec
+        
+        # Location bonus vector: +20-25 at origin (HUGE), +10-13 at destination
+        # (medium), flight-number based +0-14 elsewhere to vary results.
+        # Jitter is drawn per crew row from an RNG seeded by the flight number,
+        # so each crew member's value depends only on the flight and on them -
+        # not on who else survived filtering - and results are reproducible.
+        flight_num = int(_NON_DIGIT_RE.sub('', flight_data.get('flightNumber', '')) or 0)
+        rng = np.random.default_rng(flight_num)
+        n = len(idxs)
+        bonuses = np.full(n, flight_num % 10, dtype=np.float32)
+        bonuses[:n_origin] = 20
+        bonuses[n_origin:n_origin + n_near] = 10
+        jitter_span = np.full(n, 5, dtype=np.float32)
+        jitter_span[n_origin:n_origin + n_near] = 3
+        jitter = rng.uniform(0, 1, len(self.crew_members)).astype(np.float32)
+        bonuses += jitter[idxs] * jitter_span
         
+        if debug:
+            logger.debug("[STEP 5] WEIGHTED SCORING WITH LOCATION BOOST")
+            for pos, i in enumerate(idxs[:n_origin + n_near].tolist()):
+                crew = self.crew_members[i]
+                if pos < n_origin:
+                    logger.debug(f"   {crew.name} (AT {origin}): {base_scores[pos]:.2f} + {bonuses[pos]:.2f} (+20 location bonus)")
+                else:
+                    logger.debug(f"   {crew.name} (NEAR DEST): {base_scores[pos]:.2f} + {bonuses[pos]:.2f} (+10 bonus)")
+        
+        # Boost, then take top K (JIT-compiled when numba is installed)
+        top_positions, top_scores = _rank(base_scores, bonuses, top_k)
+        top_rows = idxs[top_positions]
+        
+        # STEP 6: Format recommendations (only here are crew objects touched)
         recommendations = []
-        for idx, (crew, score) in enumerate(top_recommendations, 1):
-            key_strengths = [
-                self._format_parameter_name(k)
-                for k, v in crew.data.items() 
-                if k.endswith('Score') and v > 85
-            ]
-            
+        for idx, (row, score) in enumerate(zip(top_rows.tolist(), top_scores.tolist()), 1):
+            crew = self.crew_members[row]
             rec = {
                 'rank': idx,
                 'emp_id': crew.emp_id,
@@ -213,14 +300,15 @@ class CrewRecommendationEngine:
                 'compositeScore': round(score, 2),
                 'parameters': {k: crew.data.get(k, 0) for k in self.WEIGHTS.keys()},
                 'weights': self.WEIGHTS,
-                'keyStrengths': key_strengths
+                'keyStrengths': crew.key_strengths
             }
             recommendations.append(rec)
-            print(f"   #{idx} {crew.name} ({crew.base_location}) - Score: {score:.2f}")
         
-        print("\n" + "="*70)
-        print(f"✓ RECOMMENDATION COMPLETE - {len(recommendations)} UNIQUE candidates for {flight_data['flightNumber']}")
-        print("="*70 + "\n")
+        if debug:
+            logger.debug(f"[STEP 6] TOP {top_k} RECOMMENDATIONS FOR {flight_data['flightNumber']}")
+            for rec in recommendations:
+                logger.debug(f"   #{rec['rank']} {rec['name']} ({rec['baseLocation']}) - Score: {rec['compositeScore']:.2f}")
+            logger.debug(f"✓ RECOMMENDATION COMPLETE - {len(recommendations)} UNIQUE candidates for {flight_data['flightNumber']}")
         
         return recommendations
     